@@ -239,6 +239,10 @@ class PluginProperty(_DescField):
 
 	def __set__(self, obj, value):
 		if hasattr(obj.io, 'pluginProps'):
+			batch = getattr(obj, '_prop_batch', None)
+			if batch is not None:	# IOM.prop_batch in progress
+				batch[self.name] = value
+				return
 			props = obj.io.pluginProps
 			props[self.name] = value
 			obj.io.replacePluginPropsOnServer(props)
@@ -260,7 +264,8 @@ def cached(calc):
 		immutable values (constants or values that don't ever change).
 		The value is computed when first needed, and is automatically
 		recomputed (only) after ConfigUI has made changes to PluginProperties
-		of the bearer object.
+		of the bearer object, or Indigo has handed it a new io (with possibly
+		different pluginProps) to start or update with.
 	"""
 	class CachedProperty(object):
 		def __get__(self, obj, type):
@@ -15,7 +15,10 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 #
-from xml.etree import ElementTree
+try:
+	from xml.etree import cElementTree as ElementTree	# C parser, where available
+except ImportError:
+	from xml.etree import ElementTree
 
 import indigo
 import cyin
@@ -15,7 +15,10 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 #
-from xml.etree import ElementTree
+try:
+	from xml.etree import cElementTree as ElementTree	# C parser, where available
+except ImportError:
+	from xml.etree import ElementTree
 import sys
 
 import indigo
@@ -72,6 +75,7 @@ class ConfigUI(object):
 		self._descmap = cls._descmap
 		self._ui_values = None
 		self._type = cls
+		self._session = None		# Plugin._startUi result for the open dialog
 
 
 	#
@@ -199,8 +203,13 @@ class ConfigUI(object):
 			return desc._eval(self._ui_values.get(desc.name))
 		raise AttributeError(name)
 
+	# attributes ConfigUI itself keeps locally (never descriptor shadows)
+	_LOCAL_ATTRS = frozenset(['_descmap', '_type', '_ui_values', '_ui_errors', '_session', 'iomtype', 'iom', 'dev'])
+
 	def __setattr__(self, name, value):
-		if name in self.__dict__:	# prefer existing local attribute
+		if name in self._LOCAL_ATTRS:	# our own bookkeeping
+			object.__setattr__(self, name, value)
+		elif name in self.__dict__:	# prefer existing local attribute
 			object.__setattr__(self, name, value)
 		elif name in self._attributes:	# underlying IOM has a descriptor
 			desc = self._attributes[name]
@@ -239,7 +248,7 @@ class ConfigUI(object):
 			may add additional fields, but cannot "reach across" and change
 			other fields. This is meant to be a localized editing facility.
 		"""
-		new = ElementTree.Element(uixml.tag, attrib=uixml.attrib)
+		new = ElementTree.Element(uixml.tag, uixml.attrib)
 		rseq = 1
 		for field in uixml:
 			new.insert(len(new), field)
@@ -81,13 +81,24 @@ class LogWriter(object):
 	def __init__(self, tag, logfunc):
 		self._log = logfunc
 		self._tag = tag
-		self._buffer = ''
+		self._chunks = []		# pieces of the current (incomplete) line
 
 	def write(self, it):
-		lines = (self._buffer + str(it)).split('\n')
-		for full_line in lines[:-1]:
+		s = str(it)
+		nl = s.rfind('\n')
+		if nl < 0:				# no line end yet; just collect
+			self._chunks.append(s)
+			return
+		self._chunks.append(s[:nl])
+		for full_line in ''.join(self._chunks).split('\n'):
 			self._log(self._tag, full_line)
-		self._buffer = lines[-1]
+		self._chunks = [s[nl+1:]] if nl+1 < len(s) else []
+
+	def flush(self):
+		""" Log any incomplete last line now. """
+		if self._chunks:
+			(chunks, self._chunks) = (self._chunks, [])
+			self._log(self._tag, ''.join(chunks))
 
 
 #
@@ -115,7 +126,8 @@ def make_folder(type, name):
 #
 def variable(name, default="", folder=None):
 	if name:
-		if folder is None and isinstance(name, basestring):
+		is_name = isinstance(name, basestring)
+		if folder is None and is_name:
 			f, s, n = name.partition('.')		# folder.name
 			if s:
 				folder = f
@@ -123,7 +135,7 @@ def variable(name, default="", folder=None):
 		if name in indigo.variables:			# return existing (in whichever folder it's in)
 			return indigo.variables[name]
 		else:									# create in specified folder and return
-			if isinstance(name, basestring):
+			if is_name:
 				return indigo.variable.create(name,
 					value=default, folder=make_folder(indigo.variables, folder))
 			else:
@@ -18,7 +18,6 @@
 from __future__ import with_statement
 import sys
 import re
-from contextlib import contextmanager
 import traceback
 
 import indigo
@@ -52,15 +51,30 @@ class QuietError(Exception):
 	"""
 	pass
 
-@contextmanager
-def diagnostic_log(name=None):
-	try:
-		yield
-	except QuietError:
-		error("execution of %s abandoned" % (name or "operation"))
-	except Exception, e:
-		error("in %s:" % name if name else "error:",
-			_edit_trace(traceback.format_exc()))
+class diagnostic_log(object):
+	""" Context manager logging (and swallowing) any Exception raised within.
+
+		This wraps every Indigo entry point, so it is a plain class rather
+		than a @contextmanager generator.
+	"""
+	def __init__(self, name=None):
+		self.name = name
+
+	def __enter__(self):
+		pass
+
+	def __exit__(self, type, value, tb):
+		if type is None:
+			return
+		name = self.name
+		if issubclass(type, QuietError):
+			error("execution of %s abandoned" % (name or "operation"))
+		elif issubclass(type, Exception):
+			error("in %s:" % name if name else "error:",
+				_edit_trace(''.join(traceback.format_exception(type, value, tb))))
+		else:
+			return			# not ours to handle
+		return True
 
 def diagnose(method):
 	def diagnose_call(*args, **kwargs):
@@ -75,8 +89,7 @@ def diagnose(method):
 def trace():
 	if cyin.DEBUG:
 		frames = traceback.format_stack()[:-2]
-		frames = [frame for frame in frames if '/PlugIns/' not in frame]
-		log("TRACEBACK\n" + _edit_trace(reduce(lambda s, t: s+t, frames)))
+		log("TRACEBACK\n" + _edit_trace(''.join(frame for frame in frames if '/PlugIns/' not in frame)))
 
 
 #
@@ -84,11 +97,19 @@ def trace():
 # This behavior is consistent for all plugins using cyin.
 #
 _modules = []
+_last_internal_debug = None		# showInternalDebug value last configured
 
 def configure():
+	global _last_internal_debug
 	# fetch debug-log settings from prefs and set for both us and Indigo's debugging
 	previous = cyin.DEBUG
 	cyin.plugin.debug = cyin.DEBUG = cyin.plugin.pluginPrefs.get("showDebugInfo", False)
+	internal_debug = cyin.plugin.pluginPrefs.get("showInternalDebug", '')
+
+	# nothing changed since last time - leave module hooks alone
+	if previous == cyin.DEBUG and internal_debug == _last_internal_debug:
+		return
+	_last_internal_debug = internal_debug
 
 	# announce changes in debug setting, but not changes from pre-setup default
 	if previous != "initial":
@@ -106,7 +127,6 @@ def configure():
 	# (re)configure DEBUG values in select modules as per showInternalDebug pref
 	if cyin.DEBUG:
 		# implement new options
-		internal_debug = cyin.plugin.pluginPrefs.get("showInternalDebug", '')
 		if internal_debug:
 			for module_name in internal_debug.split(','):
 				module = sys.modules.get(module_name.strip())
@@ -24,6 +24,7 @@
 #
 import socket
 import os
+import time
 import random
 import serial
 
@@ -45,6 +46,19 @@ FAILHARD = 'hard'		# hard error (stay down)
 STOPPED = 'stopped'		# intentional non-operating
 
 
+#
+# Recent getaddrinfo results, so soft-fail retry storms don't hammer DNS.
+# (address, port, type, flags) -> (resolution list, time resolved)
+# Python 2 has no monotonic clock, so an entry whose age comes out negative
+# (the wall clock was set back) counts as expired, just like an old one.
+#
+_gai_cache = { }
+GAI_CACHE_TTL = 30		# seconds to trust a cached resolution
+
+def _gai_fresh(entry, now):
+	return 0 <= now - entry[1] < GAI_CACHE_TTL
+
+
 #
 # A Device with some useful canned state machinery added.
 #
@@ -82,6 +96,7 @@ class Device(cyin.Device, asyn.Callable):
 	state = cyin.DeviceState(type=str)	# required
 
 	SOFT_RETRY = (5, 60)	# seconds to delay (min, max) between soft retries
+	SOFT_RETRY_FACTOR = 1.3	# backoff multiplier between soft retries
 
 	_soft_retry = None					# active retry timer
 
@@ -90,6 +105,7 @@ class Device(cyin.Device, asyn.Callable):
 		asyn.Callable.__init__(self)
 		self.mstate = OPERATING			# microstate
 		self.hostdev = None				# no host device
+		(self._soft_retry_min, self._soft_retry_max) = self.SOFT_RETRY
 
 	def start(self):
 		super(Device, self).start()
@@ -184,13 +200,13 @@ class Device(cyin.Device, asyn.Callable):
 		if self.mstate == FAILSOFT:
 			if DEBUG: DEBUG(self.name, "retry still unavailable:", self._reason(reason))
 			delay = self._soft_delay
-			self._soft_delay = min(1.3 * self._soft_delay, self.SOFT_RETRY[1])
+			self._soft_delay = min(self.SOFT_RETRY_FACTOR * delay, self._soft_retry_max)
 		else:
 			self.mstate = FAILSOFT
 			self.state = "unavailable"
 			error(self.name, "unavailable:", self._reason(reason))
 			delay = 0
-			self._soft_delay = self.SOFT_RETRY[0]
+			self._soft_delay = self._soft_retry_min
 		if DEBUG: DEBUG(self.name, "retry delay", delay, "next", self._soft_delay)
 		self._soft_retry = cyin.plugin.schedule(self._retry_soft, after=delay+random.uniform(0, 0.2))
 		self.callout('change', self)
@@ -322,7 +338,17 @@ class IPDevice(Device):
 		else:
 			try:
 				address, _, cport = address.partition(':')
-				return socket.getaddrinfo(address, cport or port, 0, type, 0, socket.AI_CANONNAME | flags)
+				key = (address, cport or port, type, flags)
+				now = time.time()
+				entry = _gai_cache.get(key)
+				if entry is not None and _gai_fresh(entry, now):
+					return entry[0]
+				for (k, old) in _gai_cache.items():	# drop expired entries (including ours)
+					if not _gai_fresh(old, now):
+						del _gai_cache[k]
+				res = socket.getaddrinfo(address, cport or port, 0, type, 0, socket.AI_CANONNAME | flags)
+				_gai_cache[key] = (res, now)
+				return res
 			except socket.gaierror, e:
 				if e[0] == socket.EAI_NONAME:
 					self.fail_hard("cannot find %s" % address)
@@ -410,9 +436,9 @@ class SubDevice(Device):
 
 	def start(self):
 		super(SubDevice, self).start()
-		if '@' not in self.address:		# not subaddress format - pass to subclass
+		(hostid, sep, subaddr) = self.address.partition('@')
+		if not sep:						# not subaddress format - pass to subclass
 			return self.setup()
-		hostid, subaddr = self.address.split('@', 2)
 		self.set_hostdev(cyin.device(int(hostid)))
 		assert self.hostdev
 		self.subaddress = subaddr
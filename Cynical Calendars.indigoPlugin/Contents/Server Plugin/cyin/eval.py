@@ -21,6 +21,7 @@
 #
 from __future__ import with_statement
 from contextlib import contextmanager
+import sys
 
 import indigo
 
@@ -35,7 +36,10 @@ from cyin.core import log, debug, error
 class Variables(object):
 
 	def __getitem__(self, name):
-		return indigo.variables[name].value
+		var = indigo.variables.get(name)
+		if var is None:
+			raise KeyError(name)
+		return var.value
 	__getattr__ = __getitem__
 
 	def __setitem__(self, name, value):
@@ -75,17 +79,43 @@ class Plugins(object):
 		return id in iom._pluginmap
 
 
+#
+# Attribute-style access to modules, importing them into a LocalScope as needed
+#
+class Modules(object):
+
+	def __init__(self, scope):
+		self._scope = scope
+
+	def __getattr__(self, name):
+		return self._scope._import(name)
+
+
 #
 # A local name scope for in-plugin evaluation of expressions
 #
+_MISSING = object()			# lookup sentinel
+
+# the containers hold no state, so all scopes share one of each
+_variables = Variables()
+_devices = Devices()
+_plugins = Plugins()
+
 class LocalScope(object):
 
 	def __init__(self, values={}, auto_import=False):
-		self._variables = Variables()
-		self._devices = Devices()
-		self._plugins = Plugins()
+		self._variables = _variables
+		self._devices = _devices
+		self._plugins = _plugins
 		self._locals = values
 		self._auto_import = auto_import
+		self._names = {			# our own attributes, as seen by expressions
+			'plugin': self.plugin,
+			'variables': self._variables,
+			'devices': self._devices,
+			'plugins': self._plugins,
+			'modules': self.modules
+		}
 
 	@property
 	def plugin(self):
@@ -105,25 +135,26 @@ class LocalScope(object):
 
 	@property
 	def modules(self):
-		class Modules(object):
-			def __getattr__(iself, name):
-				return self._import(name)
-		return Modules()
+		return Modules(self)
 
 	def __getitem__(self, name):
-		self._check_name(name)
+		if name[:1] == '_':					# don't allow private names
+			raise NameError("access to %s not allowed" % name)
 
 		# previously set local variables always win
-		if name in self._locals:
-			return self._locals[name]
+		value = self._locals.get(name, _MISSING)
+		if value is not _MISSING:
+			return value
 
-		# anything defined as an attribute here comes next
-		if hasattr(self, name):
-			return getattr(self, name)
+		# our own names come next
+		value = self._names.get(name, _MISSING)
+		if value is not _MISSING:
+			return value
 
 		# if we have an Indigo variable by this name, use its value
-		if name in self.variables:
-			return self.variables[name]
+		var = indigo.variables.get(name)
+		if var is not None:
+			return var.value
 
 		# try to import a module by that name and return it
 		if self._auto_import:
@@ -136,7 +167,8 @@ class LocalScope(object):
 		raise KeyError
 
 	def __setitem__(self, name, value):
-		self._check_name(name)
+		if name[:1] == '_':					# don't allow private names
+			raise NameError("access to %s not allowed" % name)
 		self._locals[name] = value
 
 	def __contains__(self, name):
@@ -146,14 +178,12 @@ class LocalScope(object):
 		return len(self._locals)
 
 	def _import(self, name):
-		module = __import__(name, self, self, [], 0)	# or raise exception
+		module = sys.modules.get(name)		# already imported by someone
+		if module is None:
+			module = __import__(name, self, self, [], 0)	# or raise exception
 		self._locals[name] = module
 		return module
 
-	def _check_name(self, name):
-		if name[0] == '_':					# don't allow private names
-			raise NameError("access to %s not allowed" % name)
-
 
 #
 # Default globals scope. Very limited, for safety's sake.
@@ -176,29 +206,56 @@ class GlobalScope(dict):
 # Note that additional local names are programmed into LocalScope.
 #
 # The context argument determines the globals as follows:
-#	True -> basic minimal context (indigo, logging)
+#	True -> basic minimal context (indigo, logging), fresh for each call
 #	A callable -> the result of calling it with no arguments
 #	Anything else -> use as is
 #
 @contextmanager
 def eval_context(values={}, context=True, auto_import=False):
 	if context == True:
-		context = GlobalScope()
+		context = GlobalScope()		# exec'd code may write its globals
 	elif callable(context):
 		context = context()
 	yield (context, LocalScope(values, auto_import=auto_import))
 
 
+#
+# Compiled code objects, keyed by (source, mode).
+# Triggers and actions tend to run the same text over and over,
+# so we compile it once. The cache is simply dropped when it gets full.
+# Text that doesn't compile is remembered too (as its SyntaxError), since
+# free-form fields such as calendar notes are often not code at all.
+#
+_code_cache = { }
+CODE_CACHE_LIMIT = 512
+
+def _compile(form, mode):
+	key = (form, mode)
+	code = _code_cache.get(key)
+	if code is None:
+		try:
+			code = compile(form, "<string>", mode)
+		except SyntaxError, e:
+			code = e
+		if len(_code_cache) >= CODE_CACHE_LIMIT:
+			_code_cache.clear()
+		_code_cache[key] = code
+	if isinstance(code, SyntaxError):
+		raise code
+	return code
+
+
 #
 # A single-expression evaluator.
 #
 def expression(form, check=False, **kwargs):
 	if form:
+		code = _compile(form, "eval")
 		if check:
-			return compile(form, "<string>", "eval")
+			return code
 		else:
 			with eval_context(**kwargs) as (globals, locals):
-				return eval(form, globals, locals)
+				return eval(code, globals, locals)
 
 
 #
@@ -207,8 +264,9 @@ def expression(form, check=False, **kwargs):
 #
 def evaluate(form, check=False, **kwargs):
 	if form:
+		code = _compile(form, "exec")
 		if check:
-			return compile(form, "<string>", "exec")
+			return code
 		else:
 			with eval_context(**kwargs) as (globals, locals):
-				exec form in globals, locals
+				exec code in globals, locals
@@ -20,6 +20,7 @@
 # limitations under the License.
 #
 import re
+import operator
 
 import indigo
 import cyin
@@ -64,11 +65,11 @@ class MenuFilter(object):
 		self.ui = ui
 		self._options = { }
 		if filter:
-			filters = filter.strip().split(';')
-			self.filter = filters.pop(0)
-			for option in filters:
-				(key, s, value) = option.partition('=')
-				self._options[key] = value if s else False
+			(self.filter, sep, options) = filter.strip().partition(';')
+			if sep:
+				for option in options.split(';'):
+					(key, s, value) = option.partition('=')
+					self._options[key] = value if s else False
 		else:
 			self.filter = None
 
@@ -92,10 +93,24 @@ class MenuFilter(object):
 #
 # A version of MenuFilter that uses a subclass-provided generator to yield up
 # the menu items.
+# Sort keys are remembered by label, since menus get rebuilt with the same labels.
 #
-tokenize = re.compile(r'(\d+)|(\D+)').findall
+_re_token = re.compile(r'(\d+)|(\D+)')
+_natural_keys = { }			# label -> natural_sort key
+NATURAL_KEYS_LIMIT = 4096
+
 def natural_sort(s):
-    return tuple(int(num) if num else alpha for num, alpha in tokenize(s))
+	key = _natural_keys.get(s)
+	if key is None:
+		if s.isalpha():			# common case: nothing to split
+			key = (s,)
+		else:
+			key = tuple(int(num) if num else alpha
+				for num, alpha in (m.groups() for m in _re_token.finditer(s)))
+		if len(_natural_keys) >= NATURAL_KEYS_LIMIT:
+			_natural_keys.clear()
+		_natural_keys[s] = key
+	return key
 
 class MenuGenerator(MenuFilter):
 	_abstract = True
@@ -125,6 +140,7 @@ class IOMFilter(MenuFilter):
 	_abstract = True
 
 	def evaluate(self):
+		self._terms = { }		# term -> id set, for this evaluation
 		return sorted(map(self.form, self.disj(self.filter)), key=lambda s: s[1])
 
 	def form(self, id):
@@ -134,12 +150,17 @@ class IOMFilter(MenuFilter):
 		return (iom.id, iom.name)
 
 	def disj(self, filter):
-		(left, op, right) = filter.strip().partition('|')
-		return (self.conj(left) | self.disj(right)) if op else self.conj(left)
+		return set().union(*[self.conj(clause) for clause in filter.split('|')])
 
 	def conj(self, filter):
-		(left, op, right) = filter.strip().partition('&')
- 		return (self.term(left) & self.conj(right)) if op else self.term(left)
+		return set.intersection(*[self._term(term) for term in filter.split('&')])
+
+	def _term(self, filter):
+		""" Evaluate a term at most once per evaluation. The sets are never modified. """
+		filter = filter.strip()
+		if filter not in self._terms:
+			self._terms[filter] = self.term(filter)
+		return self._terms[filter]
 
 	def term(self, filter):
 		filter = filter.strip()
@@ -150,19 +171,29 @@ class IOMFilter(MenuFilter):
 		# check for name:value according to match_property
 		(name, s, prefix) = filter.partition(':')
 		if s:
-			return set([iom.id for iom in self.collection.iter() if match_property(iom, name, prefix)])
+			match = property_matcher(name, prefix)
+			return set([iom.id for iom in self.collection.iter() if match(iom)])
 		
 		# default to Indigo collection filter
 		return set([iom.id for iom in self.collection.iter(filter)])
 
-def match_property(io, name, value):
+def property_matcher(name, value):
+	""" Return a predicate io -> bool testing name:value, for use across a whole collection. """
 	# state:statename -> presence of this named state
 	if name == 'state':
-		return value in io.states
+		return lambda io: value in io.states
 	# otherwise name:prefix -> io has a property named name whose string value begins with value
-	if hasattr(io, name):
-		attr = getattr(io, name)
+	getter = operator.attrgetter(name)
+	def match(io):
+		try:
+			attr = getter(io)
+		except AttributeError:
+			return False
 		return isinstance(attr, basestring) and attr.startswith(value)
+	return match
+
+def match_property(io, name, value):
+	return property_matcher(name, value)(io)
 	
 
 #
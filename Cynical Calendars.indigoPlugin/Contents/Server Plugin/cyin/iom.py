@@ -28,7 +28,9 @@ from cyin.core import i_equal
 from cyin.attr import PluginProperty, DeviceState, is_descriptor
 from cyin.configui import ConfigUI
 
+import re
 import datetime
+from contextlib import contextmanager
 
 DEBUG = None
 
@@ -40,18 +42,24 @@ DEBUG = None
 _iomap = { }				# indigo object id -> IOM object
 _clsmap = { }				# indigo type string -> IOM class object
 _pluginmap = { }			# indigo plugin id -> PluginCore object
+_typemap = { }				# type string as given -> IOM class object (type_for cache)
 
 _self = object()			# under-construction marker in _iomap
+_MISSING = object()			# lookup sentinel
+_generation = 0				# bumped whenever IOM activity or configuration changes
 
 
 def type_for(type, report_error=True):
 	""" Get the class object for an XML type name. Returns None (and yells) if not found. """
-	ltype = type.lower()
-	if ltype not in _clsmap:
-		if report_error:
-			error('XML inconsistent: missing class', ltype)
-		return None
-	return _clsmap[ltype]
+	cls = _typemap.get(type)
+	if cls is None:
+		ltype = type.lower()
+		if ltype not in _clsmap:
+			if report_error:
+				error('XML inconsistent: missing class', ltype)
+			return None
+		cls = _typemap[type] = _clsmap[ltype]
+	return cls
 
 
 #
@@ -68,18 +76,19 @@ def _enabled(io):
 # Map indigo IOM ("io") references to ids.
 # This works for devices and triggers (but not action groups).
 #
+_id_string = re.compile(r'[0-9]+$')	# (not str.isdigit - that takes u'\xb2' and friends)
+
 def _normalize(id, collection):
 	if not id:
 		return None						# None -> None
 	if isinstance(id, int):
 		return id						# numbers are ids
 	elif isinstance(id, basestring):
-		try:
+		if _id_string.match(id):
 			return int(id)				# numeric strings are ids
-		except ValueError:
-			dev = collection.get(id)	# try it as a device name
-			if dev:
-				return dev.id
+		dev = collection.get(id)		# try it as a device name
+		if dev:
+			return dev.id
 	else:
 		error("unexpected _normalize(%s)" % id)
 
@@ -97,6 +106,9 @@ def device(id, ui=None):
 		its indigo object id. If it's another kind of string, it is taken
 		to be the device's name.
 	"""
+	iom = _iomap.get(id)				# fast path: known device by numeric id
+	if iom is not None and iom is not _self:
+		return iom
 	id = _normalize(id, indigo.devices)
 	if id is None:
 		return None
@@ -147,21 +159,30 @@ def plugin_for(io, make=False):
 		Returns a ForeignPlugin object for other plugins.
 		Returns a BuiltinPlugin for built-in iom objects.
 	"""
-	if hasattr(io, 'pluginId'):
-		id = io.pluginId or None
-		if id in _pluginmap:
-			return _pluginmap[id]
-		if make:
-			if id:
-				return ForeignPlugin(id)
-			else:
-				return BuiltinPlugin()
+	id = getattr(io, 'pluginId', _MISSING)
+	if id is _MISSING:
+		return None
+	id = id or None
+	plugin = _pluginmap.get(id)
+	if plugin is None and make:
+		plugin = ForeignPlugin(id) if id else BuiltinPlugin()
+	return plugin
 
 
 #
 # General object lifetime harness for IOM subclasses.
 # This only works for IOMs (i.e. not for Actions).
 #
+def _changed():
+	""" Note that some IOM started, stopped, or changed configuration. """
+	global _generation
+	_generation += 1
+
+def _rebind(iom, io):
+	""" Point an IOM at a (newer) Indigo object. """
+	iom.io = io
+	iom._config_level += 1		# cyin.cached values may derive from the old io's props
+
 def start_object(io, type, ui=None):
 	""" Create or locate an object, then start it if it should be active. """
 	id = io.id
@@ -178,8 +199,9 @@ def start_object(io, type, ui=None):
 		iom = _iomap[id]
 	if _enabled(io) and not iom.active:
 		debug(iom.name, "starting")
-		iom.io = io
+		_rebind(iom, io)
 		iom.active = True
+		_changed()
 		iom.start()
 
 def stop_object(io, change=False, destroy=False):
@@ -196,6 +218,7 @@ def stop_object(io, change=False, destroy=False):
 		if iom.active:
 			debug(iom.name, "stopping")
 			iom.active = False
+			_changed()
 			iom.stop()
 		if destroy:
 			debug(iom.name, "destroyed")
@@ -214,22 +237,31 @@ def update_object(old, new, typeid):
 		iom = _iomap[new.id]
 		assert iom.id == new.id
 		iom.name = new.name			# keep newest
-		iom.io = new				# keep newest
-		descriptors = type(iom)._descmap.values()
-		# apply defaults for (newly) missing attributes
-		for desc in [desc for desc in descriptors if desc.name not in old.pluginProps and desc.default is not None]:
-			desc._apply_default(iom)
+		_rebind(iom, new)			# keep newest
+		_changed()
+		cls = type(iom)
+		oldp = old.pluginProps
+		# apply defaults for (newly) missing attributes, in one server update
+		missing = [desc for desc in cls._descdefaults if desc.name not in oldp]
+		if missing:
+			with iom.prop_batch():
+				for desc in missing:
+					desc._apply_default(iom)
 		# (but still count defaulted values as changes, this time)
-		changes = [desc for desc in descriptors
-			if desc.name not in old.pluginProps or old.pluginProps[desc.name] != new.pluginProps[desc.name]]
-		essentials = [desc.name for desc in changes if desc.reconfigure == 'essential']
+		newp = new.pluginProps
+		essentials = []
+		notifies = []
+		for desc in cls._descvalues:
+			if oldp.get(desc.name, _MISSING) != newp.get(desc.name):
+				if desc.reconfigure == 'essential':
+					essentials.append(desc.name)
+				elif desc.reconfigure == 'notify':
+					notifies.append(desc.name)
 		if essentials:
 			debug(iom.name, "reconfiguring because", ', '.join(essentials), "changed")
 			iom.reconfigure()
-		else:
-			notifies = [desc.name for desc in changes if desc.reconfigure == 'notify']
-			if notifies:
-				iom.config_changed(notifies)
+		elif notifies:
+			iom.config_changed(notifies)
 
 
 #
@@ -264,6 +296,9 @@ class IOMeta(type):
 			cls.attributes = IOMeta._collect_descriptors(cls)
 			cls._descmap = dict([(k, v) for (k, v) in cls.attributes.items()
 				if v._desc_type == config_type])
+			# fixed after class creation, so precompute what update_object wants
+			cls._descvalues = tuple(cls._descmap.values())
+			cls._descdefaults = tuple([desc for desc in cls._descvalues if desc.default is not None])
 
 
 class IOMetaMap(IOMeta):
@@ -280,6 +315,7 @@ class IOMetaMap(IOMeta):
 				name = name.lower()
 				assert name not in _clsmap
 				_clsmap[name] = cls
+				_typemap.clear()
 
 
 #
@@ -358,16 +394,14 @@ class IOMBase(object):
 	@classmethod
 	def find_attr(cls, attr, value=True):
 		""" Find the one object of this class whose attr(object) == value. Warn for duplicates. """
-		try:
-			result = None
-			gen = cls.all_attr(attr, value)
-			result = gen.next()
-			gen.next()
-			debug("ambiguous find_attr", cls, attr, value)
-		except StopIteration:
-			pass
-		finally:
-			return result
+		result = None
+		for iom in _iomap.values():		# snapshot _iomap - it may change
+			if isinstance(iom, cls) and iom.active and attr(iom) == value:
+				if result is not None:
+					debug("ambiguous find_attr", cls, attr, value)
+					break
+				result = iom
+		return result
 
 
 #
@@ -407,10 +441,9 @@ class IOM(IOMBase):
 			self._do_upgrade(old_version)
 
 	def _do_upgrade(self, old_version):
-		self.upgrade_config(old_version)
-		props = self.io.pluginProps
-		props['version_'] = self.config_version
-		self.io.replacePluginPropsOnServer(props)
+		with self.prop_batch():		# whatever upgrade_config writes goes out with version_
+			self.upgrade_config(old_version)
+			self.setProperty('version_', self.config_version)
 
 	def observe(self, kind, qual):
 		if qual is not None:
@@ -477,12 +510,41 @@ class IOM(IOMBase):
 		return self.io.pluginProps
 	
 	def setProperties(self, props):
-		self.io.replacePluginPropsOnServer(props)
+		if self._prop_batch is not None:
+			self._prop_batch = props
+		else:
+			self.io.replacePluginPropsOnServer(props)
 	
 	def setProperty(self, name, value):
-		props = self.props
-		props[name] = value
-		self.setProperties(props)
+		if self._prop_batch is not None:
+			self._prop_batch[name] = value
+		else:
+			props = self.props
+			props[name] = value
+			self.setProperties(props)
+
+	#
+	# Batched property writes:
+	#	with self.prop_batch():
+	#		self.setProperty(...); self.some_property = ...
+	# Writes are collected and sent to Indigo once when the (outermost) batch ends.
+	# Reads within the batch still see the values on the server.
+	#
+	_prop_batch = None			# pending pluginProps while batching
+	_prop_batch_depth = 0
+
+	@contextmanager
+	def prop_batch(self):
+		if self._prop_batch is None:
+			self._prop_batch = self.io.pluginProps
+		self._prop_batch_depth += 1
+		try:
+			yield self._prop_batch
+		finally:
+			self._prop_batch_depth -= 1
+			if self._prop_batch_depth == 0:
+				(props, self._prop_batch) = (self._prop_batch, None)
+				self.io.replacePluginPropsOnServer(props)
 
 
 #
@@ -544,11 +606,13 @@ class DeviceFeatures(object):
 	def lastChanged(self):
 		return self.io.lastChanged if self.io.lastChanged != self.NEVERCHANGED else None
 	
-	def secondsSinceLastChanged(self, base=datetime.datetime.now()):
+	def secondsSinceLastChanged(self, base=None):
+		""" Seconds from lastChanged to base (default now). Pass base when asking many devices. """
 		last = self.lastChanged
 		if last:
-			dt = base - last
-			return (dt.microseconds + (dt.seconds + dt.days * 24 * 3600.0) * 10**6) / 10**6
+			if base is None:
+				base = datetime.datetime.now()
+			return (base - last).total_seconds()
 
 
 #
@@ -578,9 +642,14 @@ class Device(IOM, DeviceFeatures):
 	# you may call reconfigure_state() which will trigger callbacks to your stateList()
 	# and stateDisplayField() methods to reconfigure the state data as needed.
 	#
+	_last_state_sig = None		# state configuration Indigo last fetched through us
+
 	def reconfigure_state(self):
-		""" Ask Indigo to re-fetch state information for this device. """
-		self.io.stateListOrDisplayStateIdChanged()
+		""" Ask Indigo to re-fetch state information for this device (if it changed). """
+		sig = (repr(self.stateList()), self.stateDisplayField())
+		if sig != self._last_state_sig:
+			self._last_state_sig = sig
+			self.io.stateListOrDisplayStateIdChanged()
 
 	def stateList(self):
 		""" Generate dynamic state configuration for this device. """
@@ -602,10 +671,11 @@ class Device(IOM, DeviceFeatures):
 			property directly (in the vain hope that perhaps later there'll be a better
 			way to do this).
 			By convention, any real 'address' property is currently called 'xaddress'.
+			Setting the address it already has does nothing.
 		"""
-		props = self.io.pluginProps
-		props['address'] = value
-		self.io.replacePluginPropsOnServer(props)
+		props = self._prop_batch if self._prop_batch is not None else self.io.pluginProps
+		if props.get('address') != value:
+			self.setProperty('address', value)
 
 	@staticmethod
 	def _configsDict():
@@ -625,17 +695,46 @@ class Event(IOM):
 
 		Each event subclass defines a matching method that can be used to restrict
 		what event triggers qualify. Arbitrary arguments can be passed to this method.
+
+		A subclass with many triggers can set _match_key to a staticmethod that turns
+		the matching arguments into a hashable key, and override index_keys to return
+		the keys each trigger is interested in (or None for any key). Only triggers
+		filed under that key (or None) are then asked whether they match.
 	"""
 	__metaclass__ = IOMetaMap
 	_iom_type = 'event'
 
+	_match_key = None		# optional staticmethod(*args, **kwargs) -> index key
+
 	@classmethod
 	def all_matching(cls, *args, **kwargs):
 		""" Iterate over all active events of this type that match the arguments provided. """
-		for event in cls.all():
+		if cls._match_key is None:
+			candidates = cls.all()
+		else:
+			index = cls._match_index()
+			candidates = index.get(cls._match_key(*args, **kwargs), []) + index.get(None, [])
+		for event in candidates:
 			if event.matches(*args, **kwargs):
 				yield event
 
+	@classmethod
+	def _match_index(cls):
+		""" Active events of this class by index_keys, rebuilt after any IOM change. """
+		cache = cls.__dict__.get('_match_cache')
+		if cache is None or cache[0] != _generation:
+			index = { }
+			for event in cls.all():
+				keys = event.index_keys()
+				for key in [None] if keys is None else keys:
+					index.setdefault(key, []).append(event)
+			cache = cls._match_cache = (_generation, index)
+		return cache[1]
+
+	def index_keys(self):
+		""" The _match_key values this event can match, or None for any. """
+		return None
+
 	@classmethod
 	def trigger(cls, *args, **kwargs):
 		""" Set off all triggers for this event class that match the arguments provided. """
@@ -667,14 +766,18 @@ class Action(IOMBase):
 
 	def __init__(self, io, dev=None):
 		IOMBase.__init__(self, io)
-		if not hasattr(self, 'device'):		# has no device attribute
-			if not dev:
-				if self.io:
-					if self.io.deviceId:
-						dev = cyin.device(self.io.deviceId)
-					elif 'device' in self.io.props:
-						dev = cyin.device(self.io.props['device'])
-			self.__dict__['device'] = dev	# bypass any descriptor
+		# probe the class, not the instance - that would evaluate a device descriptor
+		for klass in type(self).__mro__:
+			if 'device' in klass.__dict__:
+				return						# class defines a device attribute
+		if not dev and io:
+			if io.deviceId:
+				dev = cyin.device(io.deviceId)
+			else:
+				props = io.props
+				if 'device' in props:
+					dev = cyin.device(props['device'])
+		self.__dict__['device'] = dev	# bypass any descriptor
 
 	def eval_context(self):
 		""" Default evaluation context for actions includes self and device. """
@@ -21,6 +21,7 @@ import sys
 import os
 import select
 import time
+import threading
 import plistlib
 
 import indigo
@@ -55,6 +56,21 @@ CONCURRENT = "concurrent"			# other-thread entry, no reply
 CONFIGUI = "config_ui"				# other-thread entry, wait for reply
 
 
+#
+# Parsed plugin bundle files, by bundle location.
+# Info.plist doesn't change under a running plugin; PluginConfig.xml is
+# re-read if its modification time changes.
+#
+_info_plists = { }					# location -> parsed Info.plist
+_prefs_xmls = { }					# location -> (mtime, prefs ConfigUI XML)
+
+def _info_plist(location):
+	plist = _info_plists.get(location)
+	if plist is None:
+		plist = _info_plists[location] = plistlib.readPlist(location + "/Contents/Info.plist")
+	return plist
+
+
 #
 # The base class of all cyin plugin objects. Define a subclass Plugin
 # in your plugin.py and Indigo will create a singleton for you.
@@ -90,14 +106,14 @@ class Plugin(indigo.PluginBase, iom.PluginCore):
 		# we're sort of our own iom object, so let's quack like one
 		self.io = self
 		self._config_level = 1			# ConfigUI running revision level
-		self._config = indigo.PluginBase.getPrefsConfigUiXml(self)	# ConfigUI XML
 		self.plugin = self				# well, technically...
 		self.active = False				# will become True when Indigo tells us to run
 
 		# about ourselves on disk...
 		here = sys.modules[__name__].__file__
 		self.location = here[0:here.rindex('/Contents/')]
-		self.info_plist = plistlib.readPlist(self.location + "/Contents/Info.plist")
+		self._config = self._prefs_xml()	# ConfigUI XML
+		self.info_plist = _info_plist(self.location)
 		try:
 			self.support_url = self.info_plist["CFBundleURLTypes"][0]["CFBundleURLName"]
 		except:
@@ -111,6 +127,9 @@ class Plugin(indigo.PluginBase, iom.PluginCore):
 		debug("API version", api)
 		debug("Python version", ".".join(str(s) for s in sys.version_info))
 		self.apiVersion = StrictVersion(api)
+		self._features = {			# see supports()
+			'uivalue': self.apiVersion >= StrictVersion("1.6") or None,
+		}
 		problem = self.check_compatibility()
 		if problem:
 			error(problem)
@@ -122,7 +141,9 @@ class Plugin(indigo.PluginBase, iom.PluginCore):
 
 		# initialize state
 		self._ui = None				# pending IOM-based ConfigUI (modal, so at most one)
-		self._observing = { }
+		self._observing = { }		# kind -> subscribed to Indigo changes
+		self._observers = { }		# kind -> { observing IOM -> qualifier }
+		self._stop_event = threading.Event()	# set when the default main thread should end
 
 		# configure debug layer
 		cyin.debugging.configure()
@@ -138,6 +159,8 @@ class Plugin(indigo.PluginBase, iom.PluginCore):
 			iom.type_for(id).adapt(desc)
 		for id, desc in self.eventsTypeDict.items():
 			iom.type_for(id).adapt(desc)
+		for id in self.actionsTypeDict:	# (just warm the type_for memo)
+			iom.type_for(id, report_error=False)
 
 
 	#
@@ -165,7 +188,7 @@ class Plugin(indigo.PluginBase, iom.PluginCore):
 		except ValueError:
 			log("Indigo version %s not recognized; proceeding" % indigo.server.version)
 			return
-		if indigo_version < self.MIN_INDIGO_VERSION:
+		if indigo_version < StrictVersion(self.MIN_INDIGO_VERSION):
 			 return "Indigo version %s or later is required for version %s of the %s plugin. Please upgrade Indigo." % (
 				self.MIN_INDIGO_VERSION, self.version, self.name)
 		if indigo_version in self.BAD_INDIGO_VERSIONS:
@@ -183,8 +206,8 @@ class Plugin(indigo.PluginBase, iom.PluginCore):
 			and get back None if not supported, or Python true if it is.
 			More detailed information may be conveyed through that value.
 		"""
-		if feature == 'uivalue':	# support ..., uivalue=<str> key of state update calls
-			return self.apiVersion >= "1.6"
+		# 'uivalue': support ..., uivalue=<str> key of state update calls
+		return self._features.get(feature)
 
 
 	#
@@ -199,24 +222,31 @@ class Plugin(indigo.PluginBase, iom.PluginCore):
 	}
 
 	def _observe(self, iom, kind, qual):
-		if qual != []:
-			if kind not in self._observing:
-				self._OBSERVABLES[kind].subscribeToChanges()
-				self._observing[kind] = True
+		observers = self._observers.setdefault(kind, { })
+		if qual == []:				# observing nothing
+			observers.pop(iom, None)
+			return
+		if kind not in self._observing:
+			self._OBSERVABLES[kind].subscribeToChanges()
+			self._observing[kind] = True
+		observers[iom] = qual
 
 	# notify IOMs that have registered for change notes
 	def _notify(self, kind, op, new, make, prior=None):
-		if kind in self._observing:
-			for observer in iom.IOM.all():
-				if kind in observer._observing:
-					qual = observer._observing[kind]
-					if qual is None or new.id in qual:
-						dev = make(new.id)
-						if kind != 'variable': dev_prior = prior
-						try:
-							observer.notify(kind, op, dev)
-						finally:
-							if kind != 'variable': dev._prior = None
+		observers = self._observers.get(kind)
+		if not observers:
+			return
+		for (observer, qual) in observers.items():	# snapshot - notify may change it
+			if observer.deleted:
+				del observers[observer]
+				continue
+			if observer.active and (qual is None or new.id in qual):
+				dev = make(new.id)
+				if kind != 'variable': dev_prior = prior
+				try:
+					observer.notify(kind, op, dev)
+				finally:
+					if kind != 'variable': dev._prior = None
 
 
 	#
@@ -230,6 +260,7 @@ class Plugin(indigo.PluginBase, iom.PluginCore):
 	def begin_shutdown(self):
 		""" Called when the plugin begins shutting down. """
 		debug("shutdown sensed")
+		self._stop_event.set()
 
 	def shutdown(self):
 		""" Last call made to the plugin. """
@@ -245,11 +276,12 @@ class Plugin(indigo.PluginBase, iom.PluginCore):
 		""" Start main thread - threading version. """
 		debug("plugin starting threaded operation")
 		self.active = True
-		try:
-			while True:
-				self.sleep(3600*24*365)
-		except self.StopThread:
-			pass
+		self._stop_event.wait()
+
+	def stopConcurrentThread(self):
+		""" Indigo says, "Stop!" Release the default main thread. """
+		self._stop_event.set()
+		indigo.PluginBase.stopConcurrentThread(self)
 	
 
 
@@ -311,7 +343,18 @@ class Plugin(indigo.PluginBase, iom.PluginCore):
 	def getPrefsConfigUiXml(self):
 		if self._ui is None:
 			self._ui = self.UI(cyin.plugin)
-		return self._ui._xml(indigo.PluginBase.getPrefsConfigUiXml(self), "plugin")
+		return self._ui._xml(self._prefs_xml(), "plugin")
+
+	def _prefs_xml(self):
+		""" Indigo's prefs ConfigUI XML, reused while PluginConfig.xml is unchanged. """
+		try:
+			mtime = os.stat(self.location + "/Contents/Server Plugin/PluginConfig.xml").st_mtime
+		except OSError:
+			mtime = None
+		cached = _prefs_xmls.get(self.location)
+		if cached is None or cached[0] != mtime:
+			cached = _prefs_xmls[self.location] = (mtime, indigo.PluginBase.getPrefsConfigUiXml(self))
+		return cached[1]
 
 	@entry(CONFIGUI)
 	def getPrefsConfigUiValues(self):
@@ -338,6 +381,9 @@ class Plugin(indigo.PluginBase, iom.PluginCore):
 		cls = iom.type_for(iotype)	# implementing class
 		if self._ui is None:
 			self._ui = cls.UI(cls)
+		session = self._ui._session
+		if session is not None and session[0] == (iotype, id):
+			return session[1]			# already looked up in this ConfigUI session
 		obj = dev = None
 		if cls._iom_type == 'device':
 			obj = dev = iom.device(id, ui=self._ui) # existing object, if any
@@ -351,6 +397,7 @@ class Plugin(indigo.PluginBase, iom.PluginCore):
 			if id:
 				dev = cyin.device(id)
 			obj = cls(None, dev=dev)
+		self._ui._session = ((iotype, id), (cls, obj, dev))
 		return (cls, obj, dev)
 
 	@entry(CONFIGUI)
@@ -374,6 +421,7 @@ class Plugin(indigo.PluginBase, iom.PluginCore):
 		if obj:
 			obj.configUI = None
 		self._ui._end_ui(values, cancelled)
+		self._ui._session = None
 		self._ui = None
 
 	getDeviceConfigUiXml = getIOMConfigUiXml
@@ -503,80 +551,100 @@ class Plugin(indigo.PluginBase, iom.PluginCore):
 	# class, and thus away from the grab-bag that Indigo thinks the plugin is.
 	#
 	def __getattr__(self, name):
-		class Forward(object):
-			def __init__(self, name):
-				self.name = name
-			
-			def __call__(self, arg, *args, **kwargs):
-				if isinstance(arg, indigo.Dict):	# crude but effective
-					return self.button(arg, *args, **kwargs)
-				elif isinstance(arg, basestring):
-					return self.menufilter(arg, *args, **kwargs)
-				elif isinstance(arg, indigo.BaseAction):
-					return self.action(arg, *args, **kwargs)
-				else:
-					error('unexpected argument "%s" calling "%s"' % (arg, name))
-
-			# button (and menu change, and the like) callback
-			def button(self, config, *args):
-				ui = cyin.plugin._ui
-				ui._ui_values = config	# pick up latest values
-				assert ui
-				if hasattr(ui, name):
-					method = getattr(ui, name)
-					if hasattr(method, '_method_type'):
-						with diagnostic_log(name):
-							method()
-							return ui._ui_values	# pick up any changes
-					else:
-						error("internal error: %s is not a button or checkbox method" % name)
-						return config	# don't change anything
-				elif ui.iomtype:
-					error("no button", name, "in", ui.iomtype._iom_type, ui.iomtype.__name__)
-				else:
-					error("no button", name)
-
-			# action callback
-			def action(self, io, *args, **kwargs):
-				### Indigo 7, *args = (device, want-result), dropping for now
-				try:
-					actiontype = cyin.iom.type_for(io.pluginTypeId)
-					if not actiontype:
-						return
-				except AttributeError:
-					error("ignoring unrecognized standard action", io)
+		forwards = self.__dict__.setdefault('_forwards', { })	# (no __getattr__ recursion)
+		forward = forwards.get(name)
+		if forward is None:
+			forward = forwards[name] = Forward(name)
+		return forward
+
+
+#
+# The callable handed out for any attribute Indigo asks of the Plugin that
+# it doesn't actually have. Made once per name and kept by the Plugin.
+#
+class Forward(object):
+	__slots__ = ('name',)
+
+	def __init__(self, name):
+		self.name = name
+	
+	# dispatch on the type of the first argument (crude but effective)
+	_HANDLER_BASES = ((indigo.Dict, 'button'), (basestring, 'menufilter'), (indigo.BaseAction, 'action'))
+	_handlers = { indigo.Dict: 'button', str: 'menufilter', unicode: 'menufilter' }	# exact type -> handler
+
+	def __call__(self, arg, *args, **kwargs):
+		handlers = self._handlers
+		handler = handlers.get(type(arg))
+		if handler is None:		# first of its type - classify and remember
+			for (base, handler) in self._HANDLER_BASES:
+				if isinstance(arg, base):
+					handlers[type(arg)] = handler
+					break
+			else:
+				return error('unexpected argument "%s" calling "%s"' % (arg, self.name))
+		return getattr(self, handler)(arg, *args, **kwargs)
+
+	# button (and menu change, and the like) callback
+	def button(self, config, *args):
+		name = self.name
+		ui = cyin.plugin._ui
+		ui._ui_values = config	# pick up latest values
+		assert ui
+		if hasattr(ui, name):
+			method = getattr(ui, name)
+			if hasattr(method, '_method_type'):
+				with diagnostic_log(name):
+					method()
+					return ui._ui_values	# pick up any changes
+			else:
+				error("internal error: %s is not a button or checkbox method" % name)
+				return config	# don't change anything
+		elif ui.iomtype:
+			error("no button", name, "in", ui.iomtype._iom_type, ui.iomtype.__name__)
+		else:
+			error("no button", name)
+
+	# action callback
+	def action(self, io, *args, **kwargs):
+		### Indigo 7, *args = (device, want-result), dropping for now
+		name = self.name
+		try:
+			actiontype = cyin.iom.type_for(io.pluginTypeId)
+			if not actiontype:
+				return
+		except AttributeError:
+			error("ignoring unrecognized standard action", io)
+			return
+		action = actiontype(io)
+		target = action.bind("perform", "action") # always use an action method
+		if target is not None:
+			with diagnostic_log(name):
+				return target()
+		dev = action.device
+		if dev:	# send to device instance
+			if hasattr(dev, name):
+				target = dev.bind(name, "action")
+				if not dev.ready():
+					error("ignoring", name, "action for unready device", dev.name)
 					return
-				action = actiontype(io)
-				target = action.bind("perform", "action") # always use an action method
-				if target is not None:
-					with diagnostic_log(name):
-						return target()
-				dev = action.device
-				if dev:	# send to device instance
-					if hasattr(dev, name):
-						target = dev.bind(name, "action")
-						if not dev.ready():
-							error("ignoring", name, "action for unready device", dev.name)
-							return
-					else:
-						return error("no callback", name, "in", dev)
-				if target:
-					with diagnostic_log(name):
-						target(action)
-				else:
-					error('no method "%s" for action "%s"' % (name, action.description))
-
-			# a menu filter
-			def menufilter(self, filter, *args, **kwargs):
-				assert cyin.plugin._ui	# active ui
-				with diagnostic_log("filter %s" % name):
-					filter = cyin.filter.create(name, filter, cyin.plugin._ui)
-					if filter:
-						menu = filter._evaluate()
-						if menu:
-							return menu
-					else:
-						error("internal error: no menu filter class", name)
-				return []
-
-		return Forward(name)
+			else:
+				return error("no callback", name, "in", dev)
+		if target:
+			with diagnostic_log(name):
+				target(action)
+		else:
+			error('no method "%s" for action "%s"' % (name, action.description))
+
+	# a menu filter
+	def menufilter(self, filter, *args, **kwargs):
+		name = self.name
+		assert cyin.plugin._ui	# active ui
+		with diagnostic_log("filter %s" % name):
+			filter = cyin.filter.create(name, filter, cyin.plugin._ui)
+			if filter:
+				menu = filter._evaluate()
+				if menu:
+					return menu
+			else:
+				error("internal error: no menu filter class", name)
+		return []
@@ -31,22 +31,47 @@ from cyin.core import debug, error, log
 
 
 #
-# The base class of standard Indigo-defined actions
+# Argument makers for the dispatch tables below.
+# Each takes the Indigo action object and returns the method arguments.
+#
+def _none(io):		return ()
+def _on(io):		return (True,)
+def _off(io):		return (False,)
+def _value(io):		return (io.actionValue,)
+def _negvalue(io):	return (-io.actionValue,)
+def _mode(io):		return (io.actionMode,)
+
+
+#
+# The base class of standard Indigo-defined actions.
+# Subclasses provide a _TABLE mapping Indigo action constants to
+# (method name, complaint, argument maker) for dispatch.
 #
 class _StandardAction(iom.Action):
 
+	_TABLE = { }
+
 	def __init__(self, io, action):
 		iom.Action.__init__(self, io)
 		self.action = action
 
+	def dispatch(self):
+		action = self.action
+		entry = self._TABLE.get(action)
+		if entry is None:
+			return error(self.device.name, "has no support for", action)
+		(name, complaint, args) = entry
+		self.do(name, complaint, *args(self.io))
+
 	def do(self, name, complaint, *args):
-		if not self.device.ready():
-			return error(self.device.name, "ignoring", complaint, "request because the device is not ready")
-		method = self.device.bind(name, "action")
+		device = self.device
+		if not device.ready():
+			return error(device.name, "ignoring", complaint, "request because the device is not ready")
+		method = device.bind(name, "action")
 		if method:
 			method(*args)
 		else:
-			error(self.device.name, "cannot", complaint)
+			error(device.name, "cannot", complaint)
 
 
 #
@@ -54,89 +79,70 @@ class _StandardAction(iom.Action):
 #
 class GeneralAction(_StandardAction):
 
+	_TABLE = {
+		indigo.kDeviceAction.RequestStatus: ("standard_status", "get status", _none),
+		# there's more here - power status, beep, etc.
+	}
+
 	def __init__(self, io):
 		_StandardAction.__init__(self, io, io.deviceAction)
 
-	def dispatch(self):
-		do = self.do
-		if self.action == indigo.kDeviceAction.RequestStatus:
-			do("standard_status", "get status")
-		# there's more here - power status, beep, etc.
-		else:
-			error(self.device.name, "has no support to", self.action)
-
 
 class ControlAction(_StandardAction):
 
+	_TABLE = {
+		indigo.kDeviceAction.TurnOn: ("standard_switch", "switch on", _on),
+		indigo.kDeviceAction.TurnOff: ("standard_switch", "switch off", _off),
+		indigo.kDeviceAction.Toggle: ("standard_toggle", "toggle", _none),
+		indigo.kDeviceAction.SetBrightness: ("standard_brightness", "set brightness", _value),
+		indigo.kDeviceAction.BrightenBy: ("standard_brighten", "brighten", _value),
+		indigo.kDeviceAction.DimBy: ("standard_brighten", "dim", _negvalue),
+		indigo.kDeviceAction.RequestStatus: ("standard_status", "get status", _none),
+	}
+
 	def __init__(self, io):
 		_StandardAction.__init__(self, io, io.deviceAction)
 
-	def dispatch(self):
-		do = self.do
-		if self.action == indigo.kDeviceAction.TurnOn:
-			do("standard_switch", "switch on", True)
-		elif self.action == indigo.kDeviceAction.TurnOff:
-			do("standard_switch", "switch on", False)
-		elif self.action == indigo.kDeviceAction.Toggle:
-			do("standard_toggle", "toggle")
-		elif self.action == indigo.kDeviceAction.SetBrightness:
-			do("standard_brightness", "set brightness", self.io.actionValue)
-		elif self.action == indigo.kDeviceAction.BrightenBy:
-			do("standard_brighten", "brighten", self.io.actionValue)
-		elif self.action == indigo.kDeviceAction.SetBrightness:
-			do("standard_brighten", "dim", -self.io.actionValue)
-		elif self.action == indigo.kDeviceAction.RequestStatus:
-			do("standard_status", "get status")
-		else:
-			error(self.device.name, "has no support to", self.action)
-
 
 class SensorAction(_StandardAction):
 
+	_TABLE = {
+		indigo.kSensorAction.RequestStatus: ("standard_status", "get status", _none),
+		# add energy-management actions here
+	}
+
 	def __init__(self, io):
 		_StandardAction.__init__(self, io, io.sensorAction)
 
-	def dispatch(self):
-		if self.action == indigo.kSensorAction.RequestStatus:
-			self.do("standard_status", "get status")
-		# add energy-management actions here
-		else:
-			error(self.device.name, "has no support for", self.action)
-
 
 class ThermostatAction(_StandardAction):
 
+	_STATUS = ("standard_hvac_status", "make HVAC status requests", _none)
+	_TABLE = {
+		indigo.kThermostatAction.SetHvacMode: ("standard_hvac_mode", "set the HVAC mode", _mode),
+		indigo.kThermostatAction.SetFanMode: ("standard_hvac_fanmode", "set the fan mode", _mode),
+		indigo.kThermostatAction.SetCoolSetpoint: ("standard_set_coolpoint", "change the cool setpoint", _value),
+		indigo.kThermostatAction.SetHeatSetpoint: ("standard_set_heatpoint", "change the heat setpoint", _value),
+		indigo.kThermostatAction.IncreaseCoolSetpoint: ("standard_move_coolpoint", "change the cool setpoint", _value),
+		indigo.kThermostatAction.DecreaseCoolSetpoint: ("standard_move_coolpoint", "change the cool setpoint", _negvalue),
+		indigo.kThermostatAction.IncreaseHeatSetpoint: ("standard_move_heatpoint", "change the heat setpoint", _value),
+		indigo.kThermostatAction.DecreaseHeatSetpoint: ("standard_move_heatpoint", "change the heat setpoint", _negvalue),
+		indigo.kThermostatAction.RequestStatusAll: _STATUS,
+		indigo.kThermostatAction.RequestMode: _STATUS,
+		indigo.kThermostatAction.RequestEquipmentState: _STATUS,
+		indigo.kThermostatAction.RequestTemperatures: _STATUS,
+		indigo.kThermostatAction.RequestHumidities: _STATUS,
+		indigo.kThermostatAction.RequestDeadbands: _STATUS,
+		indigo.kThermostatAction.RequestSetpoints: _STATUS,
+	}
+
 	def __init__(self, io):
 		_StandardAction.__init__(self, io, io.thermostatAction)
 
 	def dispatch(self):
-		debug("dispatch thermostat", self.action, self.io, self.io.actionValue)
-		if self.action == indigo.kThermostatAction.SetHvacMode:
-			self.do("standard_hvac_mode", "set the HVAC mode", self.io.actionMode)
-		elif self.action == indigo.kThermostatAction.SetFanMode:
-			self.do("standard_hvac_fanmode", "set the fan mode", self.io.actionMode)
-		elif self.action == indigo.kThermostatAction.SetCoolSetpoint:
-			self.do("standard_set_coolpoint", "change the cool setpoint", self.io.actionValue)
-		elif self.action == indigo.kThermostatAction.SetHeatSetpoint:
-			self.do("standard_set_heatpoint", "change the heat setpoint", self.io.actionValue)
-		elif self.action == indigo.kThermostatAction.IncreaseCoolSetpoint:
-			self.do("standard_move_coolpoint", "change the cool setpoint", self.io.actionValue)
-		elif self.action == indigo.kThermostatAction.DecreaseCoolSetpoint:
-			self.do("standard_move_coolpoint", "change the cool setpoint", -self.io.actionValue)
-		elif self.action == indigo.kThermostatAction.IncreaseHeatSetpoint:
-			self.do("standard_move_heatpoint", "change the heat setpoint", self.io.actionValue)
-		elif self.action == indigo.kThermostatAction.DecreaseHeatSetpoint:
-			self.do("standard_move_heatpoint", "change the heat setpoint", -self.io.actionValue)
-		elif self.action in [indigo.kThermostatAction.RequestStatusAll,
-				indigo.kThermostatAction.RequestMode,
-				indigo.kThermostatAction.RequestEquipmentState,
-				indigo.kThermostatAction.RequestTemperatures,
-				indigo.kThermostatAction.RequestHumidities,
-				indigo.kThermostatAction.RequestDeadbands,
-				indigo.kThermostatAction.RequestSetpoints]:
-			self.do("standard_hvac_status", "make HVAC status requests")
-		else:
-			error(self.device.name, "has no support for", self.action)
+		io = self.io
+		debug("dispatch thermostat", self.action, io, io.actionValue)
+		_StandardAction.dispatch(self)
 
 
 class SprinklerAction(_StandardAction):
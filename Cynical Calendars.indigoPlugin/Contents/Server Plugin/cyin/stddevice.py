@@ -35,6 +35,7 @@ class ForeignDevice(cyin.iom.IOM, cyin.iom.DeviceFeatures):
 		Note that this isn't an iom.Device; it's an iom.IOM.
 	"""
 	_descmap = {}	# placebo
+	_descvalues = _descdefaults = ()
 
 
 	#
@@ -55,6 +56,7 @@ class ForeignDevice(cyin.iom.IOM, cyin.iom.DeviceFeatures):
 class ForeignTrigger(cyin.iom.IOM):
 	""" A trigger object that isn't one of ours. Stubbed out for now. """
 	_descmap = {}	# placebo
+	_descvalues = _descdefaults = ()
 
 
 #
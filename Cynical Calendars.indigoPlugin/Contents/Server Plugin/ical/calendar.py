@@ -41,6 +41,7 @@ class Calendar(object):
 		method to get change notifications, but be sure to call super().
 	"""
 	_cache = { }	# cache of calendars, by uid
+	_by_proxy = { }	# cache of calendars, by id() of the CalCalendar they hold
 
 	def __init__(self, calcal=None, **kwargs):
 		""" Create a Calendar and cache it. """
@@ -87,18 +88,27 @@ class Calendar(object):
 
 	@classmethod
 	def calendars(cls, type=None):
-		""" Return all known calendars as a list. """
-		return [cls._make(calcal) for calcal in _store.calendars()
+		""" Return all known calendars as a list (with fresh contents). """
+		Calendar._by_proxy = { }	# start over; refreshing re-registers the live proxies
+		return [cls._make(calcal, refresh=True) for calcal in _store.calendars()
 			if type is None or type == calcal.type()]
 
+	def reload(self):
+		""" Refresh this Calendar's contents from the calendar store. """
+		calcal = _store.calendarWithUID_(self.uid)
+		if calcal:
+			self._load(calcal)
+
 	@classmethod
-	def _make(cls, calcal):
-		uid = calcal.uid()
-		if uid in cls._cache:
-			cal = cls._cache[uid]
+	def _make(cls, calcal, refresh=False):
+		cal = Calendar._by_proxy.get(id(calcal))
+		if cal is None or cal._calendar is not calcal:	# (ids of dead proxies get reused)
+			cal = cls._cache.get(calcal.uid())
+			if cal is None:
+				return Calendar(calcal)
+		if refresh:
 			cal._load(calcal)
-			return cal
-		return Calendar(calcal)
+		return cal
 
 	def _create(self, title="untitled", notes=None, color=None, save=True):
 		self._calendar = CalendarStore.CalCalendar.calendar()
@@ -109,7 +119,11 @@ class Calendar(object):
 			self.save()
 
 	def _load(self, calcal):
+		old = getattr(self, '_calendar', None)
+		if old is not None and old is not calcal:
+			Calendar._by_proxy.pop(id(old), None)	# its id may be handed to another proxy
 		self._calendar = calcal
+		Calendar._by_proxy[id(calcal)] = self
 		self.uid = calcal.uid()
 		self.title = calcal.title()
 		self.notes = calcal.notes()
@@ -37,6 +37,26 @@ def _str(s):
 		return s.encode('ascii', 'replace')
 
 
+#
+# Recurring events repeat the same titles, notes, and locations many times over.
+# Share one string object per value (up to a modest length). These are unicode
+# (from PyObjC), which intern() won't take, so we keep our own table.
+#
+_shared = { }
+SHARED_LIMIT = 4096				# table entries before we start over
+SHARED_MAX_LENGTH = 256			# longer strings aren't worth it
+
+def _share(s):
+	if s is None or len(s) > SHARED_MAX_LENGTH:
+		return s
+	shared = _shared.get(s)
+	if shared is None:
+		if len(_shared) >= SHARED_LIMIT:
+			_shared.clear()
+		shared = _shared[s] = s
+	return shared
+
+
 #
 # Calendaring Events as seen by your Macintosh
 #
@@ -55,9 +75,13 @@ class Event(object):
 	START = 'start'
 	END = 'end'
 
+	_moments = None		# cached moments() result; reset by _load
+
 	def moments(self):
 		""" The Moments of an Event are its start end end time. """
-		return [Moment(self, 'start'), Moment(self, 'end')]
+		if self._moments is None:
+			self._moments = [Moment(self, 'start'), Moment(self, 'end')]
+		return self._moments
 
 	def save(self):
 		""" Tell the calendaring system that we've changed an Event: "Make it so." """
@@ -86,15 +110,21 @@ class Event(object):
 	def add_alarm(self, alarm):
 		self._event.addAlarm_(alarm._make())
 
-	@classmethod
-	def events(cls, start=None, end=None, calendars=None, uid=None):
-		""" Locate and return events satisfying given conditions. """
+	@staticmethod
+	def _range(start, end, calendars):
+		""" The (start, end, calendars) arguments of CalendarStore event predicates. """
 		start = NSDate.date() if start is None else NSDate.dateWithTimeIntervalSince1970_(start)
 		end = NSDate.distantFuture() if end is None else NSDate.dateWithTimeIntervalSince1970_(end)
 		if calendars is None:
 			cals = _store.calendars()
 		else:
 			cals = [cal._calendar for cal in calendars]
+		return (start, end, cals)
+
+	@classmethod
+	def events(cls, start=None, end=None, calendars=None, uid=None):
+		""" Locate and return events satisfying given conditions. """
+		(start, end, cals) = cls._range(start, end, calendars)
 		iclass = CalendarStore.CalCalendarStore
 		if uid is None:
 			predicate = iclass.eventPredicateWithStartDate_endDate_calendars_(start, end, cals)
@@ -107,17 +137,29 @@ class Event(object):
 		""" Fetch events for a given uid. This returns multiple objects only for repeating events. """
 		return Event.events(uid=uid, calendars=calendars)
 
+	@classmethod
+	def events_for_uids(cls, uids, calendars=None):
+		""" Fetch events for several uids at once. Returns a dict uid -> [Event, ...]. """
+		(start, end, cals) = cls._range(None, None, calendars)
+		make = CalendarStore.CalCalendarStore.eventPredicateWithStartDate_endDate_UID_calendars_
+		result = { }
+		for uid in uids:
+			if uid not in result:
+				result[uid] = [Event(calev) for calev in _store.eventsWithPredicate_(make(start, end, uid, cals))]
+		return result
+
 	def _load(self, calev):
 		self._event = calev
+		self._moments = None
 		self.uid = calev.uid()
-		self.title = calev.title()
-		self.notes = calev.notes()
+		self.title = _share(calev.title())
+		self.notes = _share(calev.notes())
 		self.occurrence = calev.occurrence().timeIntervalSince1970()
 		self.start = calev.startDate().timeIntervalSince1970()
 		self.end = calev.endDate().timeIntervalSince1970()
 		self.detached = calev.isDetached()
 		self.all_day = calev.isAllDay()
-		self.location = calev.location()
+		self.location = _share(calev.location())
 		self.calendar = Calendar._make(calev.calendar())
 
 	def _create(self, calendar, title, notes=None, start=None, duration=None, end=None, all_day=False, location=None, save=True):
@@ -172,7 +214,18 @@ class EventCore(object):
 	def __init__(self, calevs):
 		self.update(calevs)
 
+	@staticmethod
+	def _signature(calevs):
+		""" Everything about calevs that EventCore and Moment users can see. """
+		return tuple((ev.occurrence, ev.start, ev.end, ev.all_day, ev.detached,
+			ev.title, ev.notes, ev.location, ev.calendar) for ev in calevs)
+
+	def same(self, calevs):
+		""" Would update(calevs) change nothing of substance? """
+		return self._signature(calevs) == self._sig
+
 	def update(self, calevs):
+		self._sig = self._signature(calevs)
 		self.count = len(calevs)
 		cores = [ev for ev in calevs if not ev.detached]
 		assert cores
@@ -221,6 +274,7 @@ class EventCore(object):
 #
 class Moment(object):
 	""" A Moment is one time point of an Event or Task. """
+	__slots__ = ('event', 'type', 'when')
 
 	def __init__(self, event, type):
 		self.event = event
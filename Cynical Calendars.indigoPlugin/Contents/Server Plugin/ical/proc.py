@@ -16,6 +16,9 @@
 # limitations under the License.
 #
 import time
+import bisect
+import operator
+from collections import defaultdict
 
 import asyn
 import asyn.dsmonitor
@@ -41,6 +44,8 @@ NOTIFY_REMOVED = 'CalDeletedRecordsKey'
 class Processor(asyn.Callable):
 	""" Process calendar state as it changes. """
 
+	NOTIFY_DELAY = 0.25		# seconds to collect a burst of change notes into one update
+
 	def __init__(self, control, calendars=None, callout=None, monitor=True):
 		asyn.Callable.__init__(self, callout=callout)
 		self.control = control
@@ -50,10 +55,23 @@ class Processor(asyn.Callable):
 		self.raw_events = None
 		self.events = None
 		self.moments = None
+		self._when_keys = None		# [m.when for m in self.moments], for bisecting
+		self._moments_by_uid = None	# uid -> [Moment, ...] in self.moments
+		self._dropped = set()		# uids to take out of the time sequence (see _merge_moments)
+		self._added = []			# raw events to put into the time sequence
+		self._pending = None		# (removed, inserted, changed) uid sets not yet processed
+		self._pending_sched = None	# timer to process them
+		self._monitor_handlers = {	# monitor ctx.state -> handler
+			'notify': self._collect,
+			'END': self._monitor_end,
+		}
 
 	def close(self):
 		if self._monitor:
 			self._monitor.close()
+		if self._pending_sched:
+			self._pending_sched.cancel()
+			self._pending_sched = None
 
 	def load(self, reset=None):
 		""" (Re)Load events from iCal and sort them into a time sequence.
@@ -65,16 +83,18 @@ class Processor(asyn.Callable):
 
 		# collect events
 		if not self.events or reset:
-			uids = { }
+			uids = defaultdict(list)
 			for ev in raw:
-				if ev.uid not in uids:
-					uids[ev.uid] = []
 				uids[ev.uid].append(ev)
-			self.events = dict([(uid, EventCore(evs)) for (uid, evs) in uids.items()])
+			self.events = dict((uid, EventCore(evs)) for (uid, evs) in uids.iteritems())
 
 		# collect all moments from all input events (including past starts)
-		self.moments = reduce(lambda a,b: a+b, [ev.moments() for ev in raw], [])
-		self.moments.sort(key=lambda m: m.when)
+		self.moments = [m for ev in raw for m in ev.moments()]
+		self.moments.sort(key=operator.attrgetter('when'))
+		self._when_keys = [m.when for m in self.moments]
+		self._moments_by_uid = defaultdict(list)
+		for m in self.moments:
+			self._moments_by_uid[m.event.uid].append(m)
 
 		# all done
 		if DEBUG: DEBUG('Processor loaded', len(self.raw_events), 'events', len(self.moments), 'moments')
@@ -82,6 +102,8 @@ class Processor(asyn.Callable):
 		self.monitor()
 
 	def monitor(self):
+		if self.calendars is not None and not self.calendars:
+			return			# watching no calendars; no change can concern us
 		if self._monitor_changes and self._monitor is None:
 			self._monitor = asyn.dsmonitor.DSMonitor(self.control,
 				['com.apple.CalendarStore.CalDistributedEventsChangedNotification'],
@@ -91,14 +113,53 @@ class Processor(asyn.Callable):
 	def _core_event(self, ctx, *it):
 		if ctx.error:
 			return self.callout(ctx)
-		elif ctx.state == 'notify':
-			self._notify_event(*it)
-		elif ctx.state == 'END':
-			self.callout('monitorfail')
-			self.monitor()	# attempt relaunch
+		handler = self._monitor_handlers.get(ctx.state)
+		if handler:
+			handler(*it)
 		else:
 			print 'UNEXPECTED', ctx
 
+	def _monitor_end(self, *it):
+		self.callout('monitorfail')
+		self._monitor = None
+		self.monitor()	# attempt relaunch
+
+	def _collect(self, name, info):
+		""" Merge a change note into the pending batch and restart its timer. """
+		if self._pending is None:
+			self._pending = (set(), set(), set())
+		(removed, inserted, changed) = self._pending
+		for uid in info.get(NOTIFY_REMOVED) or []:
+			if uid in inserted:		# came and went within the window
+				inserted.discard(uid)
+			else:
+				removed.add(uid)
+			changed.discard(uid)
+		for uid in info.get(NOTIFY_INSERTED) or []:
+			if uid in removed:		# went and came back
+				removed.discard(uid)
+				changed.add(uid)
+			else:
+				inserted.add(uid)
+		for uid in info.get(NOTIFY_UPDATED) or []:
+			if uid not in inserted:
+				changed.add(uid)
+		if self._pending_sched:
+			self._pending_sched.cancel()
+		self._pending_sched = self.control.schedule(self._flush_pending, after=self.NOTIFY_DELAY)
+
+	def _flush_pending(self, ctx):
+		if ctx.error:
+			return self.callout(ctx)
+		(removed, inserted, changed) = self._pending
+		self._pending = self._pending_sched = None
+		if removed or inserted or changed:
+			self._notify_event(None, {
+				NOTIFY_REMOVED: list(removed),
+				NOTIFY_INSERTED: list(inserted),
+				NOTIFY_UPDATED: list(changed)
+			})
+
 	def _notify_event(self, name, info):
 		assert info
 		NSRunLoop.currentRunLoop().runUntilDate_(NSDate.date()) # update CalendarStore
@@ -112,13 +173,22 @@ class Processor(asyn.Callable):
 			if uid in self.events:
 				removed_evs.append(self.events[uid])
 				del self.events[uid]
+			self._drop_moments(uid)
+		fresh = Event.events_for_uids(list(inserted_uids) + list(changed_uids), calendars=self.calendars)
 		for uid in inserted_uids:
-			inserted_evs.append(self._update(uid))
+			inserted_evs.append(self._update(uid, fresh[uid]))
 		for uid in changed_uids:
-			changed_evs.append(self._update(uid))
-		self.load()
+			changed_evs.append(self._update(uid, fresh[uid]))
+		self._merge_moments()
+		if DEBUG: DEBUG('Processor updated to', len(self.raw_events), 'events', len(self.moments), 'moments')
+		self.callout('reload')
+		self._moments_changed()
 		self.post_update((removed_evs, inserted_evs, changed_evs))
 
+	# for override by child classes: self.moments was edited in place
+	def _moments_changed(self):
+		pass
+
 	# for override by child classes
 	def pre_update(self, changes):
 		pass
@@ -128,14 +198,71 @@ class Processor(asyn.Callable):
 	#
 	# Deal with incoming update notifications
 	#
-	def _update(self, uid):
-		events = Event.for_uid(uid)
+	def _update(self, uid, events=None):
+		if events is None:
+			events = Event.for_uid(uid, calendars=self.calendars)
+		evc = self.events.get(uid)
+		if events and evc is not None and evc.same(events):
+			return evc		# spurious change note; keep what we have
+		self._drop_moments(uid)
 		if events:
+			self._add_moments(events)
 			if uid in self.events:
 				evc = self.events[uid].update(events)
 			else:
 				self.events[uid] = evc = EventCore(events)
 			return evc
+		self._purge(uid)	# no longer in view (moved to the past or another calendar)
+
+	#
+	# Edits to the time sequence are collected by _drop_moments and _add_moments,
+	# then applied together by _merge_moments in linear time.
+	#
+	def _drop_moments(self, uid):
+		""" Note that the raw events and moments of uid should leave the time sequence. """
+		if self._moments_by_uid.pop(uid, None):
+			self._dropped.add(uid)
+
+	def _add_moments(self, events):
+		""" Note that the moments of (fresh) raw events should join the time sequence. """
+		self._added.extend(events)
+		for ev in events:
+			self._moments_by_uid[ev.uid].extend(ev.moments())
+
+	def _merge_moments(self):
+		self._prune_past()
+		(dropped, added) = (self._dropped, self._added)
+		if dropped:
+			self.raw_events = [ev for ev in self.raw_events if ev.uid not in dropped]
+			self.moments = [m for m in self.moments if m.event.uid not in dropped]
+		if added:
+			self.raw_events.extend(added)
+			new = [m for ev in added for m in ev.moments()]
+			new.sort(key=operator.attrgetter('when'))
+			self.moments.extend(new)		# two sorted runs...
+			self.moments.sort(key=operator.attrgetter('when'))	# ... which sort() merges in one pass
+		if dropped or added:
+			self._when_keys = [m.when for m in self.moments]
+		self._dropped = set()
+		self._added = []
+
+	def _prune_past(self):
+		""" Take events that have ended out of view, as a fresh load() would. """
+		now = time.time()
+		past = bisect.bisect_left(self._when_keys, now)	# every ended event has all its moments before this
+		ended = set(m.event.uid for m in self.moments[:past] if m.event.end < now)
+		if not ended:
+			return
+		self.raw_events = [ev for ev in self.raw_events if ev.uid not in ended or ev.end >= now]
+		self.moments = [m for m in self.moments if m.event.uid not in ended or m.event.end >= now]
+		self._when_keys = [m.when for m in self.moments]
+		for uid in ended:
+			moments = [m for m in self._moments_by_uid.get(uid, []) if m.event.end >= now]
+			if moments:
+				self._moments_by_uid[uid] = moments
+			else:		# nothing of it left in view
+				self._moments_by_uid.pop(uid, None)
+				self._purge(uid)
 
 	def _purge(self, uid):
 		if uid in self.events:
@@ -157,10 +284,6 @@ class Monitor(Processor):
 	def __init__(self, control, calendars=None, callout=None, monitor=True):
 		super(Monitor, self).__init__(control, calendars=calendars,
 			callout=callout, monitor=monitor)
-		self.sched = None
-
-	def pre_update(self, changes):
-		super(Monitor, self).pre_update(changes)
 
 	def post_update(self, changes):
 		super(Monitor, self).post_update(changes)
@@ -184,12 +307,12 @@ class Performer(Processor):
 		super(Performer, self).load(reset=reset)
 
 		# initialize self.current to the "now" position in moments, then start timers
-		now = time.time()
-		self.current = 0	# "now" position in self.moments
-		while self.current < len(self.moments) and self.moments[self.current].when < now:
-			self.current += 1
+		self._moments_changed()
 		self._schedule()
 
+	def _moments_changed(self):
+		self.current = bisect.bisect_left(self._when_keys, time.time())	# "now" position
+
 	def _schedule(self):
 		if self.current < len(self.moments):
 			moment = self.moments[self.current]
@@ -229,7 +352,8 @@ class Performer(Processor):
 		self._schedule()
 
 	def _drain(self):
-		while self.current < len(self.moments) and self.moments[self.current].when <= time.time():
+		due = bisect.bisect_right(self._when_keys, time.time())	# end of moments now past
+		while self.current < due:
 			moment = self.moments[self.current]
 			self.current += 1
 			self.callout('event', moment)
@@ -246,22 +370,26 @@ class Computer(Processor):
 			callout=callout, monitor=monitor)
 
 	def analyze(self, overlaps=None, gaps=None, limit=None, all_day=False):
+		START = Event.START
+		END = Event.END
 		active = set()
 		overlap_sets = set()
 		previous=None
 		for m in self.moments:
-			if m.type == Event.START:
+			type = m.type
+			event = m.event
+			if type == START:
 				if gaps is not None and previous and not active:
-					gaps.append((previous, m, m.event.start - previous.event.end))
-				if all_day or not m.event.all_day:
-					active.add(m.event)
+					gaps.append((previous, m, event.start - previous.event.end))
+				if all_day or not event.all_day:
+					active.add(event)
 				if len(active) > 1:
 					if overlaps is not None:
 						overlap = frozenset(active)
 						if overlap not in overlap_sets:
 							overlaps[m.when] = overlap
 							overlap_sets.add(overlap)
-			elif m.type == Event.END:
-				if all_day or not m.event.all_day:
-					active.remove(m.event)
+			elif type == END:
+				if all_day or not event.all_day:
+					active.remove(event)
 				previous = m
@@ -16,6 +16,7 @@
 # limitations under the License.
 #
 import re
+from operator import itemgetter
 
 import asyn
 import ical
@@ -24,9 +25,16 @@ import cyin.filter
 from cyin import iom, plug
 from cyin import log, debug, error
 from cyin.asynplugin import action
+from cyin.debugging import diagnostic_log
 from cyin.check import *
 
 
+#
+# The Indigo variable that receives the title of each event that sets off a CalEvent.
+#
+_TITLE_VAR_ID = 1208226755
+
+
 #
 # Map a calendar uid to a calendar object.
 # Special-case 'ALL' to None (indicating all calendars).
@@ -38,6 +46,17 @@ def cal_uid(uid):
 		return ical.Calendar.for_uid(uid)
 
 
+#
+# Make a ConfigUI checkbox callback that turns (other) on when (this) is turned off.
+#
+def _keep_one(this, other):
+	@cyin.checkbox
+	def checked(self):
+		if not getattr(self, this):
+			setattr(self, other, True)
+	return checked
+
+
 #
 # Events
 #
@@ -48,17 +67,33 @@ class _EventCore(cyin.Event):
 	location = cyin.PluginProperty(type=re.compile, required=False, reconfigure=False)
 	calendar = cyin.PluginProperty(type=cal_uid, required=False, reconfigure=False)
 
+	# the above, evaluated (and compiled) once per configuration
+	# (cyin.cached drops them after a ConfigUI edit or when Indigo hands us a new io)
+	_title_re = cyin.cached(lambda self: self.title)
+	_notes_re = cyin.cached(lambda self: self.notes)
+	_location_re = cyin.cached(lambda self: self.location)
+	_calendar = cyin.cached(lambda self: self.calendar)
+
+	def _make_checks(self):
+		""" Build the tests for just the components this trigger was configured with.
+			Rebuilt along with the cached values it closes over.
+		"""
+		checks = []
+		calendar = self._calendar
+		if calendar:
+			checks.append(lambda ev: calendar == ev.calendar)
+		for (rx, field) in ((self._title_re, 'title'), (self._location_re, 'location'), (self._notes_re, 'notes')):
+			if rx:
+				checks.append(lambda ev, search=rx.search, field=field: search(getattr(ev, field)))
+		return tuple(checks)
+	_checks = cyin.cached(_make_checks)
+
 	def match(self, ev):
 		""" Event match: all present components must match. """
-		debug(self.name, "checking match for", ev.title)
-		if self.calendar and self.calendar != ev.calendar:
-			return False
-		if self.title and not self.title.search(ev.title):
-			return False
-		if self.location and not self.location.search(ev.location):
-			return False
-		if self.notes and not self.notes.search(ev.notes):
-			return False
+		if cyin.DEBUG: debug(self.name, "checking match for", ev.title)
+		for check in self._checks:
+			if not check(ev):
+				return False
 		return True
 
 
@@ -71,22 +106,30 @@ class CalEvent(_EventCore):
 	match_allday = cyin.PluginProperty(type=bool, reconfigure=False)
 	execute_notes = cyin.PluginProperty(type=bool, reconfigure=False)
 
+	_title_var = None		# the _TITLE_VAR_ID variable (resolved in Plugin.startup)
+	_last_title = None		# last title written to it
+
+	# triggers are indexed by the (moment type, all-day) combinations they accept
+	_match_key = staticmethod(lambda moment: (moment.type, bool(moment.event.all_day)))
+
+	def index_keys(self):
+		types = [type for (type, on) in ((ical.Event.START, self.match_start), (ical.Event.END, self.match_end)) if on]
+		days = [day for (day, on) in ((True, self.match_allday), (False, self.match_hourly)) if on]
+		return [(type, day) for type in types for day in days]
+
 	def matches(self, moment):
-		""" Event match: all present components must match. """
+		""" Event match: all present components must match.
+			(Moment type and all-day status were already checked through index_keys.)
+		"""
 		if not self.match(moment):
 			return False
-		if moment.type == moment.event.START and not self.match_start:
-			return False
-		if moment.type == moment.event.END and not self.match_end:
-			return False
-		if moment.event.all_day and not self.match_allday:
-			return False
-		if not moment.event.all_day and not self.match_hourly:
-			return False
 		# it's a match
 		notes = moment.event.notes
 		title = moment.event.title
-		indigo.variable.updateValue(1208226755, title)
+		last = CalEvent._last_title
+		if title is not last and title != last and CalEvent._title_var is not None:
+			indigo.variable.updateValue(CalEvent._title_var, title)
+			CalEvent._last_title = title
 		if notes and self.execute_notes:
 			log("executing notes field for", self.name)
 			cyin.eval.evaluate(notes, values={
@@ -97,22 +140,11 @@ class CalEvent(_EventCore):
 		return True
 
 	class UI(cyin.ConfigUI):
-		@cyin.checkbox
-		def match_start_checked(self):
-			if not self.match_start:
-				self.match_end = True
-		@cyin.checkbox
-		def match_end_checked(self):
-			if not self.match_end:
-				self.match_start = True
-		@cyin.checkbox
-		def match_hourly_checked(self):
-			if not self.match_hourly:
-				self.match_allday = True
-		@cyin.checkbox
-		def match_allday_checked(self):
-			if not self.match_allday:
-				self.match_hourly = True
+		# at least one of each pair must stay checked
+		match_start_checked = _keep_one('match_start', 'match_end')
+		match_end_checked = _keep_one('match_end', 'match_start')
+		match_hourly_checked = _keep_one('match_hourly', 'match_allday')
+		match_allday_checked = _keep_one('match_allday', 'match_hourly')
 
 
 class CalChange(_EventCore):
@@ -120,20 +152,32 @@ class CalChange(_EventCore):
 	match_removed = cyin.PluginProperty(type=bool)
 	match_changed = cyin.PluginProperty(type=bool)
 
-	def matches(self, type, evcore):
-		""" Event match: all present components must match. """
-		if not self.match(evcore):
-			return False
+	# triggers are indexed by the change types they accept
+	_match_key = staticmethod(lambda type, evcore: type)
 
-		if type == "inserted" and not self.match_inserted:
-			return false
-		if type == "removed" and not self.match_removed:
-			return false
-		if type == "changed" and not self.match_changed:
-			return false
+	def index_keys(self):
+		return [type for (type, on) in (
+			("inserted", self.match_inserted),
+			("removed", self.match_removed),
+			("changed", self.match_changed)) if on]
 
-		# it's a match
-		return True
+	def matches(self, type, evcore):
+		""" Event match: all present components must match.
+			(Change type was already checked through index_keys.)
+		"""
+		return self.match(evcore)
+
+	@classmethod
+	def trigger_batch(cls, changes):
+		""" Set off triggers for a whole (removed, inserted, changed) update.
+			Change types nobody subscribes to are skipped outright.
+		"""
+		index = cls._match_index()
+		for (type, evs) in zip(("removed", "inserted", "changed"), changes):
+			if evs and type in index:
+				for ev in evs:
+					if ev is not None:
+						cls.trigger(type, ev)	# (through the same index, by _match_key)
 
 
 #
@@ -142,14 +186,18 @@ class CalChange(_EventCore):
 class Calendars(cyin.filter.MenuFilter):
 
 	def evaluate(self):
-		return (
-			[('ALL', 'All Calendars')] +
-			sorted([(cal.uid, cal.title) for cal in ical.Calendar.calendars()], key=lambda s: s[1])
-		)
+		# build once per ConfigUI session; the next dialog sees calendar changes
+		menu = getattr(self.ui, '_calendars_menu', None)
+		if menu is None:
+			menu = [('ALL', 'All Calendars')]
+			menu.extend(sorted([(cal.uid, cal.title) for cal in ical.Calendar.calendars()], key=itemgetter(1)))
+			if self.ui is not None:
+				self.ui._calendars_menu = menu
+		return list(menu)	# _evaluate may append to what we return
 
 
 #
-# We don't want much from iCal - just change and timed events
+# We don't want much from iCal - just change (Monitor) and timed (Performer) events
 #
 class CalendarHandler(ical.Monitor, ical.Performer):
 	pass
@@ -162,6 +210,13 @@ class Plugin(cyin.asynplugin.Plugin):
 
 	def startup(self):
 		super(Plugin, self).startup()
+		CalEvent._title_var = cyin.variable(_TITLE_VAR_ID)	# (complains if missing)
+		self._calev_handlers = {	# callout state -> handler(data)
+			'event': self._on_event,
+			'update': self._on_update,
+			'reload': self._on_reload,
+			'empty': self._on_empty,
+		}
 		self.handler = CalendarHandler(control=self, callout=self._calev)
 		self.handler.load()
 
@@ -169,18 +224,30 @@ class Plugin(cyin.asynplugin.Plugin):
 		""" Callout from the Calendar interface reporting something happened. """
 		if ctx.error:
 			return error(ctx.error)
-		if ctx.state == 'event':
-			debug("dispatching", data.type, "event", data.title)
-			CalEvent.trigger(data)
-		elif ctx.state == 'update':
-			(removed, inserted, changed) = data
-			for ev in removed:
-				CalChange.trigger('removed', ev)
-			for ev in inserted:
-				CalChange.trigger('inserted', ev)
-			for ev in changed:
-				CalChange.trigger('changed', ev)
-		elif ctx.state == 'reload':
-			debug("calendar reloaded")
-		elif ctx.state == 'empty':
-			log("no future event(s) in calendars")
+		handler = self._calev_handlers.get(ctx.state)
+		if handler:
+			handler(data)
+
+	def _on_event(self, moment):
+		if cyin.DEBUG: debug("dispatching", moment.type, "event", moment.title)
+		CalEvent.trigger(moment)
+
+	def _on_update(self, changes):	# fan out on a later turn of the run loop
+		(removed, inserted, changed) = changes
+		if not (removed or inserted or changed):
+			return		# nothing we can trigger on (reload storms, out-of-view edits)
+		sched = self.schedule(self._trigger_changes)
+		sched.changes = changes
+
+	def _on_reload(self, data):
+		debug("calendar reloaded")
+
+	def _on_empty(self, data):
+		log("no future event(s) in calendars")
+
+	def _trigger_changes(self, ctx):
+		""" Set off CalChange triggers for the (removed, inserted, changed) update scheduled by _on_update. """
+		if ctx.error:
+			return error(ctx.error)
+		with diagnostic_log("calendar change triggers"):	# keep trigger trouble out of the run loop
+			CalChange.trigger_batch(ctx.sched.changes)